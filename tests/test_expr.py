@@ -79,6 +79,15 @@ class TestAlgebra(unittest.TestCase):
         algebra.parse("f (d1 x) (d2 y)")
         self.assertRaises(error.TATypeError, algebra.parse, "f (d1 x) (d2 x)")
 
+    def test_repeated_parse_is_independent(self):
+        A = Type.declare('A')
+        algebra = TransformationAlgebra(d=Data(lambda α: α))
+        t1 = algebra.parse("d")
+        t2 = algebra.parse("d")
+        self.assertIsNot(t1, t2)
+        t1.type.unify(A.instance())
+        self.assertTrue(t2.type.variables())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,9 @@
 import unittest
+from unittest import mock
 
 from transformation_algebra import error
 from transformation_algebra.type import \
-    Type, TypeSchema, TypeVar, _
+    Type, TypeSchema, TypeVar, Constraint, _
 
 
 class TestType(unittest.TestCase):
@@ -313,6 +314,86 @@ class TestType(unittest.TestCase):
         y = f.apply(g)
         self.assertEqual(len(y.constraints), 0)
 
+    def test_repeated_constraint_options(self):
+        B = Type.declare('B')
+        C = Type.declare('C', supertype=B)
+        f = TypeSchema(lambda x: x ** x | x @ [B, C, B])
+        self.apply(f, B, B)
+
+    def test_constraint_check_is_remembered(self):
+        A, B = Type.declare('A'), Type.declare('B')
+        F = Type.declare('F', params=2)
+        x = TypeVar()
+        c = x @ [F(A, B), F(B, A)]
+        self.assertFalse(c.fulfilled())
+        self.assertIsNotNone(c._memo)
+        with mock.patch.object(Constraint, 'minimize') as minimize:
+            self.assertFalse(c.fulfilled())
+            minimize.assert_not_called()
+
+    def test_constraint_check_is_redone_on_change(self):
+        A, B = Type.declare('A'), Type.declare('B')
+        for attr, value in (('lower', A), ('upper', B), ('wildcard', True)):
+            with self.subTest(attr=attr):
+                x = TypeVar()
+                c = x @ [A, B]
+                self.assertIsNotNone(c._memo)
+                setattr(x, attr, value)
+                with mock.patch.object(Constraint, 'minimize',
+                        autospec=True, side_effect=Constraint.minimize) as m:
+                    c.fulfilled()
+                    m.assert_called_once()
+
+    def test_constraint_check_is_not_remembered_after_unification(self):
+        A, B = Type.declare('A'), Type.declare('B')
+        F = Type.declare('F', params=2)
+        x = TypeVar()
+        c = x @ F(A, B)  # checked, and thereby unified, on construction
+        self.assertIsNotNone(c.skeleton)
+        self.assertTrue(c._memo is None or c._memo[0] == c.canonical_key())
+
+    def test_follow_compresses_binding_chains(self):
+        A = Type.declare('A')
+        x, y, z = TypeVar(), TypeVar(), TypeVar()
+        x.bind(y)
+        y.bind(z)
+        z.bind(A.instance())
+        self.assertEqual(x.follow(), A.instance())
+        self.assertIs(x.unified, z.unified)
+        self.assertIs(y.unified, z.unified)
+
+    def test_schema_instances_are_independent(self):
+        A = Type.declare('A')
+        F = Type.declare('F', params=2)
+        f = TypeSchema(lambda x, y: F(x, _) ** y ** x)
+        t1, t2 = f.instance(), f.instance()
+        self.assertTrue(t1.variables().isdisjoint(t2.variables()))
+        t1.apply(F(A, A))
+        self.assertEqual(len(t2.variables()), 3)
+        self.assertEqual(len(f.instance().variables()), 3)
+
+    def test_schema_instances_share_captured_variables(self):
+        A = Type.declare('A')
+        v = TypeVar()
+        f = TypeSchema(lambda x: x ** v)
+        t1, t2 = f.instance(), f.instance()
+        self.assertIs(t1.params[1], v)
+        self.assertIs(t2.params[1], v)
+        self.assertIsNot(t1.params[0], t2.params[0])
+        v.bind(A.instance())
+        self.assertEqual(f.instance().params[1], A.instance())
+
+    def test_ground_types(self):
+        A = Type.declare('A')
+        F = Type.declare('F', params=2)
+        self.assertIs(A.instance(), A.instance())
+        self.assertTrue(F(A, A ** A).ground)
+        self.assertFalse(F(A, _).ground)
+        x = TypeVar()
+        t = F(A, x)
+        x.bind(A.instance())
+        self.assertFalse(t.ground)
+
 
 if __name__ == '__main__':
     unittest.main()
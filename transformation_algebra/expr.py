@@ -6,10 +6,11 @@ from __future__ import annotations
 
 from enum import Enum, auto
 from abc import ABC
-from functools import reduce, partial
-from itertools import groupby, chain
+from functools import partial, lru_cache
+from itertools import groupby
 from inspect import signature, Signature, Parameter
-from typing import Optional, Dict, Callable, Union, List, Iterable, Set
+from typing import Optional, Dict, Callable, Union, List, Iterable, Set, \
+    Tuple
 
 from transformation_algebra import error
 from transformation_algebra.type import \
@@ -21,6 +22,8 @@ class Definition(ABC):
     A definition represents a non-instantiated data input or transformation.
     """
 
+    __slots__ = ('name', 'type', 'description', 'composition')
+
     def __init__(
             self,
             type: Union[Type, Callable[..., TypeInstance]],
@@ -49,6 +52,8 @@ class Data(Definition):
     expression.
     """
 
+    __slots__ = ()
+
     def __init__(self, *nargs, **kwargs):
         self.composition = None
         super().__init__(*nargs, **kwargs)
@@ -61,6 +66,8 @@ class Operation(Definition):
     base expression.
     """
 
+    __slots__ = ()
+
     def __init__(
             self, *nargs,
             derived: Optional[Callable[..., Expr]] = None, **kwargs):
@@ -99,6 +106,8 @@ class Operation(Definition):
 ###############################################################################
 
 class Expr(ABC):
+    __slots__ = ('type',)
+
     def __init__(self, type: TypeInstance):
         self.type = type
 
@@ -106,9 +115,11 @@ class Expr(ABC):
         return self.tree()
 
     def __call__(self, *args: Union[Expr, Definition]) -> Expr:
-        return reduce(Expr.apply,
-            (e if isinstance(e, Expr) else e.instance() for e in args),
-            self)
+        result = self
+        for arg in args:
+            result = result.apply(
+                arg if isinstance(arg, Expr) else arg.instance())
+        return result
 
     def tree(self, lvl: str = "") -> str:
         """
@@ -183,15 +194,19 @@ class Expr(ABC):
         """
         Obtain leaf expressions.
         """
-        if isinstance(self, (Base, Variable)):
-            yield self
-        elif isinstance(self, Abstraction):
-            assert isinstance(self.body, Expr)
-            for v in self.body.leaves():
-                yield v
-        elif isinstance(self, Application):
-            for v in chain(self.f.leaves(), self.x.leaves()):
-                yield v
+        # Expression trees can get deep, so rather than stacking a generator
+        # for every level, we keep our own stack of subexpressions to visit
+        stack: List[Expr] = [self]
+        while stack:
+            expr = stack.pop()
+            if isinstance(expr, (Base, Variable)):
+                yield expr
+            elif isinstance(expr, Abstraction):
+                assert isinstance(expr.body, Expr)
+                stack.append(expr.body)
+            elif isinstance(expr, Application):
+                stack.append(expr.x)
+                stack.append(expr.f)
 
     def labels(self) -> List[str]:
         """
@@ -243,6 +258,8 @@ class Base(Expr):
     primitive transformations.
     """
 
+    __slots__ = ('definition', 'label')
+
     def __init__(self, definition: Definition, label: Optional[str] = None):
         self.definition = definition
         self.label: Optional[str] = label
@@ -259,6 +276,8 @@ class Application(Expr):
     its first argument to the expression in its second argument.
     """
 
+    __slots__ = ('f', 'x')
+
     def __init__(self, f: Expr, x: Expr):
         self.f: Expr = f
         self.x: Expr = x
@@ -275,6 +294,8 @@ class Abstraction(Expr):
     primitives and then not fully applying the derived function.
     """
 
+    __slots__ = ('body', 'params')
+
     def __init__(self, composition: Callable[..., Expr]):
         self.body: Union[Expr, Callable[..., Expr]] = composition
         self.type: Optional[TypeInstance] = None  # only provided once complete
@@ -312,6 +333,8 @@ class Variable(Expr):
     An expression variable. See `Abstraction`.
     """
 
+    __slots__ = ('_name',)
+
     def __init__(self, name: Optional[str] = None):
         self._name = name
         super().__init__(type=TypeVar())
@@ -375,7 +398,7 @@ class TransformationAlgebra(object):
         labels: Dict[str, TypeInstance] = dict()
         stack: List[Optional[Expr]] = [None]
 
-        for token_group, chars in groupby(string, Token.ize):
+        for token_group, chars in tokenize(string):
             if token_group is Token.RPAREN:
                 for rparen in chars:
                     try:
@@ -398,7 +421,7 @@ class TransformationAlgebra(object):
                 except IndexError as e:
                     raise error.LBracketMismatch from e
             elif token_group is Token.IDENT:
-                token = "".join(chars)
+                token = chars
                 previous = stack.pop()
                 if previous and isinstance(previous, Base) \
                         and isinstance(previous.definition, Data):
@@ -436,18 +459,35 @@ class Token(Enum):
 
     @staticmethod
     def ize(char: str) -> Token:
-        if ord(char) == 40:
-            return Token.LPAREN
-        elif ord(char) == 41:
-            return Token.RPAREN
-        elif ord(char) == 44:
-            return Token.COMMA
+        token = punctuation.get(char)
+        if token:
+            return token
         elif char.isspace():
             return Token.SPACE
         else:
             return Token.IDENT
 
 
+"Characters that form a token by themselves."
+punctuation: Dict[str, Token] = {
+    "(": Token.LPAREN,
+    ")": Token.RPAREN,
+    ",": Token.COMMA,
+}
+
+
+@lru_cache(maxsize=4096)
+def tokenize(string: str) -> Tuple[Tuple[Token, str], ...]:
+    """
+    Split a string into groups of consecutive characters of the same kind.
+    Since the same expressions tend to be parsed over and over, the result is
+    cached; only the token stream is reused, never the resulting expression.
+    """
+    return tuple(
+        (token_group, "".join(chars))
+        for token_group, chars in groupby(string, Token.ize))
+
+
 def varnames(prefix: str, i: int = 1) -> Iterable[str]:
     """
     An endless iterable of variable names.
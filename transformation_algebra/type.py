@@ -7,12 +7,21 @@ from __future__ import annotations
 from enum import Enum, auto
 from abc import ABC, abstractmethod
 from itertools import chain
+from functools import lru_cache
 from inspect import signature
-from typing import Optional, Iterable, Union, Callable, List, Set
+from typing import Optional, Iterable, Iterator, Union, Callable, List, Set, \
+    FrozenSet, Tuple, Hashable, Dict, Any
 
 from transformation_algebra import error
 
 
+"A template for type instances. See `TypeSchema.instance`."
+Template = Union[int, 'TypeOperation', Tuple['TypeOperator', Tuple[Any, ...]]]
+
+"A hashable snapshot of a type. See `TypeInstance.canonical_key`."
+Key = Tuple[Hashable, ...]
+
+
 class Variance(Enum):
     """
     The variance of a type parameter indicates how subtype relations of
@@ -33,6 +42,8 @@ class Type(ABC):
     and type instances.
     """
 
+    __slots__ = ()
+
     def __repr__(self) -> str:
         return str(self)
 
@@ -46,7 +57,9 @@ class Type(ABC):
         # associative, matching the conventional behaviour of the function
         # arrow. The right-bitshift operator >> (for __rshift__) might have
         # been more intuitive visually, but would not have this property.
-        return Function(self.instance(), other.instance())
+        # Since this is how every function type gets built, we skip the
+        # generic parameter handling of Function.__call__.
+        return TypeOperation(Function, self.instance(), other.instance())
 
     def __or__(self, constraint: Constraint) -> TypeInstance:
         """
@@ -99,7 +112,7 @@ class Type(ABC):
             f.bind(Function(TypeVar(), TypeVar()))
             f = f.follow()
 
-        if isinstance(f, TypeOperation) and f.operator == Function:
+        if isinstance(f, TypeOperation) and f.operator is Function:
             x.unify(f.params[0], subtype=True)
             f.resolve()
             return f.params[1].resolve()
@@ -111,7 +124,7 @@ class Type(ABC):
         Does this type represent a function?
         """
         t = self.instance()
-        return isinstance(t, TypeOperation) and t.operator == Function
+        return isinstance(t, TypeOperation) and t.operator is Function
 
     @abstractmethod
     def instance(self) -> TypeInstance:
@@ -138,17 +151,60 @@ class TypeSchema(Type):
     is, a type containing some schematic type variable.
     """
 
+    __slots__ = ('schema', 'n', '_copyable', '_template', '_wildcards')
+
     def __init__(self, schema: Callable[..., TypeInstance]):
         self.schema = schema
         self.n = len(signature(schema).parameters)
 
+        # A template from which instances can be built without calling the
+        # schema, if that is possible. See `instance`.
+        self._copyable: Optional[bool] = None
+        self._template: Optional[Template] = None
+        self._wildcards: Tuple[bool, ...] = ()
+
     def __str__(self) -> str:
         return self.schema(
             *(TypeVar(v) for v in signature(self.schema).parameters)
         ).resolve().str_with_constraints()
 
     def instance(self) -> TypeInstance:
-        return self.schema(*(TypeVar() for _ in range(self.n)))
+        # Schemata are instantiated all the time, and calling the schema
+        # rebuilds the entire type from scratch. Unless constraints or bounds
+        # are involved, whose side effects cannot be replayed, or variables
+        # from outside the schema, which must not be replaced, it is cheaper to
+        # build the type from a template made from the first instance.
+        if self._template is not None:
+            return TypeSchema.build(self._template,
+                [TypeVar(wildcard=w) for w in self._wildcards])
+
+        fresh = [TypeVar() for _ in range(self.n)]
+        t = self.schema(*fresh)
+        if self._copyable is None:
+            self._copyable = all(
+                not (v.constraints or v.lower or v.upper)
+                and (v.wildcard or v in fresh)
+                for v in t.variables())
+            if self._copyable:
+                variables: Dict[TypeVar, int] = {}
+                self._template = t.template(variables)
+                self._wildcards = tuple(v.wildcard for v in variables)
+        return t
+
+    @staticmethod
+    def build(template: Template, variables: List[TypeVar]) -> TypeInstance:
+        """
+        Build a type instance from a template, substituting the variable
+        placeholders with the given variables.
+        """
+        if isinstance(template, tuple):
+            op, params = template
+            return TypeOperation(op, *[
+                TypeSchema.build(p, variables) for p in params])
+        elif isinstance(template, int):
+            return variables[template]
+        else:
+            return template
 
 
 class TypeOperator(Type):
@@ -157,6 +213,9 @@ class TypeOperator(Type):
     the corresponding type operation (that is, a base type).
     """
 
+    __slots__ = ('name', 'supertype', 'variance', 'arity', 'ancestors',
+        '_basic_instance')
+
     def __init__(
             self,
             name: str,
@@ -170,6 +229,14 @@ class TypeOperator(Type):
         if self.supertype and self.arity > 0:
             raise ValueError("only nullary types can have direct supertypes")
 
+        # Supertypes are fixed at declaration, so the transitive closure of
+        # the supertype relation can be computed once, turning subtype checks
+        # into a single lookup instead of a walk up the hierarchy
+        self.ancestors: FrozenSet[TypeOperator] = frozenset(
+            (supertype, *supertype.ancestors)) if supertype else frozenset()
+
+        self._basic_instance: Optional[TypeOperation] = None
+
     def __str__(self) -> str:
         return self.name
 
@@ -178,11 +245,13 @@ class TypeOperator(Type):
 
     def subtype(self, other: TypeOperator, strict: bool = False) -> bool:
         assert isinstance(other, TypeOperator)
-        return ((not strict and self == other) or
-            bool(self.supertype and self.supertype.subtype(other)))
+        return (not strict and self is other) or other in self.ancestors
 
-    def instance(self) -> TypeInstance:
-        return TypeOperation(self)
+    def instance(self) -> TypeOperation:
+        # Base types are ground, so a single instance can be shared by all
+        if self._basic_instance is None:
+            self._basic_instance = TypeOperation(self)
+        return self._basic_instance
 
 
 class TypeInstance(Type):
@@ -192,6 +261,8 @@ class TypeInstance(Type):
     2-ary type operators.
     """
 
+    __slots__ = ()
+
     def str_with_constraints(self) -> str:
         """
         Like str(), but includes constraints.
@@ -218,7 +289,7 @@ class TypeInstance(Type):
 
         if isinstance(a, TypeOperation):
             for v, p in zip(a.operator.variance, a.params):
-                p.resolve(prefer_lower ^ (v == Variance.CONTRA))
+                p.resolve(prefer_lower ^ (v is Variance.CONTRA))
         elif isinstance(a, TypeVar):
             if prefer_lower and a.lower:
                 a.bind(a.lower())
@@ -227,11 +298,19 @@ class TypeInstance(Type):
         return a.follow()
 
     def __contains__(self, value: TypeInstance) -> bool:
-        a = self.follow()
+        # This is the occurs check of unification, so we walk the type with an
+        # explicit stack. A variable cannot occur in a ground subtype, so those
+        # need not be visited when looking for one
         b = value.follow()
-        return a.unifiable(b) is True or (
-            isinstance(a, TypeOperation) and
-            any(b in t for t in a.params))
+        variable = isinstance(b, TypeVar)
+        stack: List[TypeInstance] = [self]
+        while stack:
+            a = stack.pop().follow()
+            if a.unifiable(b) is True:
+                return True
+            elif isinstance(a, TypeOperation) and not (variable and a.ground):
+                stack.extend(a.params)
+        return False
 
     def variables(self) -> Set[TypeVar]:
         """
@@ -245,25 +324,63 @@ class TypeInstance(Type):
                     result.add(v1)
         return result
 
-    def variables_iter(self) -> Iterable[TypeVar]:
+    def variables_iter(self) -> Iterator[TypeVar]:
         """
         Obtain an iterator of variables in this type instance, excluding
         variables that might occur in constraints, with possible repetitions.
         """
-        a = self.follow()
-        if isinstance(a, TypeVar):
-            yield a
-        elif isinstance(a, TypeOperation):
-            for v in chain(*(t.variables_iter() for t in a.params)):
-                yield v
+        # Traverse with an explicit stack rather than a generator per node, and
+        # skip ground subtypes, which cannot contain variables
+        stack: List[TypeInstance] = [self]
+        while stack:
+            a = stack.pop().follow()
+            if isinstance(a, TypeVar):
+                yield a
+            elif isinstance(a, TypeOperation) and not a.ground:
+                stack.extend(reversed(a.params))
+
+    def canonical_key(
+            self,
+            variables: Optional[Dict[TypeVar, int]] = None) -> Key:
+        """
+        A hashable snapshot of the current structure of this type, including
+        the bounds of its variables. Variables are numbered in order of first
+        occurrence, according to (and updating) the given mapping, so that the
+        key reflects the pattern in which variables occur rather than their
+        identity.
+        """
+        if variables is None:
+            variables = {}
+        key: List[Hashable] = []
+        stack: List[TypeInstance] = [self]
+        while stack:
+            a = stack.pop().follow()
+            if isinstance(a, TypeOperation):
+                key.append(a.operator)
+                stack.extend(reversed(a.params))
+            else:
+                assert isinstance(a, TypeVar)
+                i = variables.setdefault(a, len(variables))
+                key.append((i, a.lower, a.upper, a.wildcard))
+        return tuple(key)
 
     def follow(self) -> TypeInstance:
         """
         Follow a unification until bumping into a type that is not yet bound.
         """
-        if isinstance(self, TypeVar) and self.unified:
-            return self.unified.follow()
-        return self
+        # This is called at every node the unifier visits, so we walk the chain
+        # of bindings in a loop rather than recursing for every link
+        t = self
+        while isinstance(t, TypeVar) and t.unified:
+            t = t.unified
+
+        # Compress the path: every variable along the way is pointed directly
+        # at the end of the chain, so that it need not be walked again
+        v = self
+        while v is not t:
+            assert isinstance(v, TypeVar)
+            v.unified, v = t, v.unified
+        return t
 
     def skeleton(self) -> TypeInstance:
         """
@@ -279,6 +396,22 @@ class TypeInstance(Type):
         else:
             return self
 
+    def template(self, variables: Dict[TypeVar, int]) -> Template:
+        """
+        A template of this type, in which variables are substituted with
+        their index in the given mapping (which is updated as needed) and
+        compound types with a pair of operator and parameter templates. Base
+        types are never mutated, so they are kept as-is. See `TypeSchema`.
+        """
+        a = self.follow()
+        if isinstance(a, TypeOperation):
+            if a.basic:
+                return a
+            return (a.operator, tuple(p.template(variables) for p in a.params))
+        else:
+            assert isinstance(a, TypeVar)
+            return variables.setdefault(a, len(variables))
+
     def unifiable(
             self,
             other: TypeInstance,
@@ -297,14 +430,14 @@ class TypeInstance(Type):
                 if subtype:
                     return a.operator.subtype(b.operator)
                 else:
-                    return a.operator == b.operator
-            elif a.operator != b.operator:
+                    return a.operator is b.operator
+            elif a.operator is not b.operator:
                 return False
             else:
                 result: Optional[bool] = True
                 for v, s, t in zip(a.operator.variance, a.params, b.params):
                     r = TypeInstance.unifiable(
-                        *((s, t) if v == Variance.CO else (t, s)),
+                        *((s, t) if v is Variance.CO else (t, s)),
                         subtype=subtype,
                         accept_wildcard=accept_wildcard)
                     if r is False:
@@ -327,7 +460,7 @@ class TypeInstance(Type):
             if accept_wildcard and a.wildcard:
                 return True
         elif isinstance(a, TypeVar) and isinstance(b, TypeVar):
-            if a == b or (a.wildcard and b.wildcard):
+            if a is b or (a.wildcard and b.wildcard):
                 return True
             if accept_wildcard and (a.wildcard or b.wildcard):
                 return True
@@ -348,14 +481,14 @@ class TypeInstance(Type):
             if a.basic:
                 if subtype and not a.operator.subtype(b.operator):
                     raise error.SubtypeMismatch(a, b)
-                elif not subtype and a.operator != b.operator:
+                elif not subtype and a.operator is not b.operator:
                     raise error.TypeMismatch(a, b)
-            elif a.operator == b.operator:
+            elif a.operator is b.operator:
                 for v, x, y in zip(a.operator.variance, a.params, b.params):
-                    if v == Variance.CO:
+                    if v is Variance.CO:
                         x.unify(y, subtype=subtype)
                     else:
-                        assert v == Variance.CONTRA
+                        assert v is Variance.CONTRA
                         y.unify(x, subtype=subtype)
             else:
                 raise error.TypeMismatch(a, b)
@@ -396,10 +529,16 @@ class TypeOperation(TypeInstance):
     An instance of an n-ary type constructor.
     """
 
+    __slots__ = ('operator', 'params', '_ground')
+
     def __init__(self, op: TypeOperator, *params: TypeInstance):
         self.operator = op
         self.params = list(params)
 
+        # Whether this type is ground is only determined once it is asked for,
+        # since most types are built without ever being asked. See `ground`
+        self._ground: Optional[bool] = None
+
         if len(self.params) != self.operator.arity:
             raise ValueError(
                 f"{self.operator} takes {self.operator.arity} "
@@ -407,10 +546,21 @@ class TypeOperation(TypeInstance):
                 f"{len(self.params)} given"
             )
 
+    @property
+    def ground(self) -> bool:
+        """
+        A ground type contains no variables, bound or otherwise, and so it can
+        never change.
+        """
+        if self._ground is None:
+            self._ground = all(isinstance(p, TypeOperation) and p.ground
+                for p in self.params)
+        return self._ground
+
     def __str__(self) -> str:
-        if self.operator == Function:
+        if self.operator is Function:
             inT, outT = self.params
-            if isinstance(inT, TypeOperation) and inT.operator == Function:
+            if isinstance(inT, TypeOperation) and inT.operator is Function:
                 return f"({inT}) ** {outT}"
             return f"{inT} ** {outT}"
         elif self.params:
@@ -419,7 +569,8 @@ class TypeOperation(TypeInstance):
             return str(self.operator)
 
     def __eq__(self, other: object) -> bool:
-        return isinstance(other, TypeInstance) and bool(self.unifiable(other))
+        return self is other or (
+            isinstance(other, TypeInstance) and bool(self.unifiable(other)))
 
     @property
     def basic(self) -> bool:
@@ -431,6 +582,9 @@ class TypeVar(TypeInstance):
     A type variable. This is not a schematic variable — it is instantiated!
     """
 
+    __slots__ = ('_name', 'wildcard', 'unified', 'lower', 'upper',
+        'constraints')
+
     def __init__(self, name: Optional[str] = None, wildcard: bool = False):
         self._name = name
         self.wildcard = wildcard
@@ -475,7 +629,7 @@ class TypeVar(TypeInstance):
                 if self.upper:
                     t.below(self.upper)
 
-                if t.lower == t.upper and t.lower is not None:
+                if t.lower is t.upper and t.lower is not None:
                     t.bind(t.lower())
 
             elif isinstance(t, TypeOperation):
@@ -539,6 +693,9 @@ class Constraint(object):
     alternatives.
     """
 
+    __slots__ = ('reference', 'alternatives', 'description', 'skeleton',
+        '_memo')
+
     def __init__(
             self,
             reference: TypeInstance,
@@ -548,6 +705,10 @@ class Constraint(object):
         self.description = str(self)
         self.skeleton: Optional[TypeInstance] = None
 
+        # The state in which this constraint was last checked, along with the
+        # outcome of that check. See `fulfilled`.
+        self._memo: Optional[Tuple[Key, bool]] = None
+
         # Inform variables about the constraint present on them
         for v in self.variables():
             assert not v.unified
@@ -567,7 +728,7 @@ class Constraint(object):
             result = result.union(t.variables())
         return result
 
-    def variables_iter(self) -> Iterable[TypeVar]:
+    def variables_iter(self) -> Iterator[TypeVar]:
         return chain(
             self.reference.variables_iter(),
             *(o.variables_iter() for o in self.alternatives)
@@ -579,6 +740,11 @@ class Constraint(object):
         alternatives that are equal to, or more general versions of, other
         alternatives.
         """
+        # A single remaining alternative is minimal by definition, which is
+        # the common case once a constraint has been narrowed down
+        if len(self.alternatives) < 2:
+            return
+
         minimized: List[TypeInstance] = []
         for obj in self.alternatives:
             add = True
@@ -598,8 +764,14 @@ class Constraint(object):
         fulfilled and need not be enforced any longer.
         """
 
-        # TODO Minimization is expensive and it is performed on every variable
-        # binding. Make this more efficient?
+        # Constraints are checked on every binding of any of their variables,
+        # often repeatedly for the same situation. Minimization is expensive,
+        # so if nothing changed since the last check, we reuse its outcome
+        state = self.canonical_key()
+        if self._memo and self._memo[0] == state:
+            return self._memo[1]
+        skeleton_before = self.skeleton
+
         self.minimize()
 
         compatibility = [
@@ -620,8 +792,25 @@ class Constraint(object):
 
         # Fulfillment is achieved if the reference is fully concrete and there
         # is at least one definitely compatible alternative
-        return (not any(self.reference.variables()) and any(compatibility)) or \
-            self.reference in self.alternatives
+        result = (any(compatibility) and
+            next(self.reference.variables_iter(), None) is None) \
+            or self.reference in self.alternatives
+
+        # Unification may have changed the state underneath us, in which case
+        # the outcome cannot be trusted for the state we started out with
+        if self.skeleton is skeleton_before:
+            self._memo = (state, result)
+        return result
+
+    def canonical_key(self) -> Key:
+        """
+        A hashable snapshot of the reference and alternatives of this
+        constraint, with variables numbered consistently across all of them.
+        See `TypeInstance.canonical_key`.
+        """
+        variables: Dict[TypeVar, int] = {}
+        return (bool(self.skeleton), self.reference.canonical_key(variables),
+            *(t.canonical_key(variables) for t in self.alternatives))
 
 
 "The special constructor for function types."
@@ -641,9 +830,22 @@ def operators(
     """
     options: List[TypeInstance] = []
     for op in ops:
-        for i in ([at - 1] if at else range(op.arity)) if param else [-1]:
-            if i < op.arity:
+        if param:
+            for i in positions(op.arity, at):
                 options.append(op(*(
-                    param if param and i == j else _ for j in range(op.arity)
+                    param if i == j else _ for j in range(op.arity)
                 )))
+        else:
+            options.append(op(*(_,) * op.arity))
     return options
+
+
+@lru_cache(maxsize=None)
+def positions(arity: int, at: Optional[int] = None) -> Tuple[int, ...]:
+    """
+    The parameter indices of an operator of the given arity at which a
+    parameter may be placed: only the given (1-based) one, or all of them.
+    """
+    if at:
+        return (at - 1,) if at - 1 < arity else ()
+    return tuple(range(arity))